@@ -0,0 +1,33 @@
+"""indices_producao_por_ano
+
+Revision ID: 7c1e5a9d2f40
+Revises: 3b62a63934e7
+Create Date: 2026-10-18 07:09:52.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e5a9d2f40'
+down_revision: Union[str, Sequence[str], None] = '3b62a63934e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY não bloqueia escritas em producao_impacto durante a criação
+    # (o índice composto passa de 500 MB com 10M linhas), mas não roda dentro
+    # de transação: por isso o autocommit_block.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_producao_impacto_ano_associacao_mes', 'producao_impacto', ['ano', 'associacao_id', 'mes'], unique=False, postgresql_include=['categoria', 'peso_kg', 'valor_gerado'], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_producao_impacto_ano_associacao_mes', table_name='producao_impacto', postgresql_concurrently=True)
@@ -0,0 +1,115 @@
+# app/core/cache.py
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Hashable, NamedTuple, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+
+class CachedPayload(NamedTuple):
+    """Resposta já serializada, pronta para enviar"""
+    body: bytes
+    etag: str
+    last_modified: datetime
+
+
+class ResponseCache:
+    """
+    Cache LRU em memória (por processo) para respostas públicas.
+
+    - max_entries limita o tamanho; a entrada menos usada sai primeiro.
+    - ttl_seconds é uma rede de segurança para quando há vários workers:
+      invalidate() só limpa o cache do processo que fez a escrita.
+    - last_modified marca a última invalidação (usado no header Last-Modified).
+    - versao muda a cada invalidate(): quem vai consultar o banco lê a versão
+      antes e a passa para set(), que descarta o resultado se houve escrita
+      no meio (senão o dado velho ficaria no cache até o TTL).
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: int = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.versao = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.last_modified = _agora()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, versao: int) -> Any:
+        """Guarda value (se versao ainda é a atual) e o devolve"""
+        with self._lock:
+            if versao != self.versao:
+                return value
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self) -> None:
+        """Chamado depois de qualquer escrita nos dados cacheados"""
+        with self._lock:
+            self._entries.clear()
+            self.versao += 1
+            self.last_modified = _agora()
+
+    def payload(self, data: Any) -> CachedPayload:
+        """Serializa uma vez e calcula o ETag forte (hash do corpo)"""
+        body = json.dumps(
+            jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        return CachedPayload(body=body, etag=etag, last_modified=self.last_modified)
+
+
+def _agora() -> datetime:
+    # Last-Modified só tem precisão de segundos
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def _not_modified(request: Request, payload: CachedPayload) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Comparação fraca (RFC 7232): proxies com gzip trocam "x" por W/"x"
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or payload.etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return payload.last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def cached_json_response(request: Request, payload: CachedPayload) -> Response:
+    """Responde 304 se o navegador já tem esta versão; senão envia o JSON cacheado"""
+    headers = {
+        "ETag": payload.etag,
+        "Last-Modified": format_datetime(payload.last_modified, usegmt=True),
+        "Cache-Control": "public, no-cache",
+    }
+    if _not_modified(request, payload):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+# =============== INSTÂNCIAS ===============
+producao_cache = ResponseCache()
+associacoes_cache = ResponseCache()
+associacoes_paginas_cache = ResponseCache()
@@ -8,8 +8,8 @@ from .afiliados import *
 
 __all__ = [
     "create_usuario", "get_usuario", "get_usuario_by_username",
-    "create_associacao", "get_associacao", "get_associacoes",
-    "create_producao", "get_producao", "get_producoes",
+    "create_associacao", "get_associacao", "get_associacoes", "get_painel_associacao",
+    "create_producao", "get_producao", "get_producoes", "upsert_producoes_lote", "importar_producoes",
     "create_grupo", "get_grupo", "get_grupos",
     "create_municipio", "get_municipio", "get_municipios",
     "create_afiliado", "get_afiliado", "get_afiliados",  # ← Novo
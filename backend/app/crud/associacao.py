@@ -1,168 +1,108 @@
-from sqlalchemy.orm import Session, joinedload
+import math
+from sqlalchemy.orm import Session, selectinload
 from app import models
+from app.core.cache import associacoes_cache, associacoes_paginas_cache, producao_cache
 from datetime import datetime
 from sqlalchemy import func, and_
 from typing import List, Optional
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert
 
 from .. import schemas
+from app.utils.texto import normalizar_nome
 
-def get_associacao(db: Session, associacao_id: int):
-    """Buscar associação por ID com parceiro carregado"""
-    query = db.query(models.Associacao).options(
-        joinedload(models.Associacao.parceiro_info)
-    ).filter(models.Associacao.id == associacao_id).first()
-    return query
+def get_associacao(db: Session, associacao_id: int) -> Optional[models.Associacao]:
+    """Buscar associação por ID"""
+    return db.query(models.Associacao).filter(models.Associacao.id == associacao_id).first()
 
 def get_all_associacoes(db: Session, skip: int = 0, limit: int = 100, ativo: bool = True) -> dict:
-    """Lista associações ATIVAS com paginação e contagem total."""
-    
-    # 1. Query base
-    query = db.query(models.Associacao).join(models.Parceiro)
-    
+    """Lista associações com paginação e contagem total (formato de AssociacoesPaginadasResponse)"""
+    query = db.query(models.Associacao)
     if ativo:
         query = query.filter(models.Associacao.ativo == True)
 
-    # 2. Contagem total
-    total_count = query.count()
+    total = query.count()
+    items = query.order_by(models.Associacao.nome).offset(skip).limit(limit).all()
 
-    # 3. Busca da página atual
-    items = (
-        query
-        .options(joinedload(models.Associacao.parceiro_info))
-        .order_by(models.Parceiro.nome)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-    
-    # ✅ Converte para dicionário com nome do parceiro
-    items_data = []
-    for assoc in items:
-        items_data.append({
-            "id": assoc.id,
-            "parceiro_id": assoc.parceiro_id,
-            "nome": assoc.parceiro_info.nome if assoc.parceiro_info else "N/A",
-            "lider": assoc.lider,
-            "telefone": assoc.telefone,
-            "email": assoc.email,
-            "cnpj": assoc.cnpj,
-            "logradouro": assoc.logradouro,
-            "numero": assoc.numero,
-            "complemento": assoc.complemento,
-            "bairro": assoc.bairro,
-            "cidade": assoc.cidade,
-            "uf": assoc.uf,
-            "status": assoc.status,
-            "ativo": assoc.ativo,
-            "data_cadastro": assoc.data_cadastro
-        })
-    
-    return {"total_count": total_count, "items": items_data}
+    return {
+        "items": items,
+        "total": total,
+        "page": skip // limit + 1,
+        "page_size": limit,
+        "pages": math.ceil(total / limit),
+    }
 
 def get_associacoes_ativas(db: Session) -> List[models.Associacao]:
     """Buscar todas associações ativas (para o frontend público)"""
     return (
         db.query(models.Associacao)
         .filter(models.Associacao.ativo == True)
-        .options(joinedload(models.Associacao.parceiro_info))
-        .order_by(models.Parceiro.nome)
+        .order_by(models.Associacao.nome)
         .all()
     )
 
+def _invalidar_caches():
+    """Listas públicas de associações e produção (que filtra pela associação "Rede")"""
+    associacoes_cache.invalidate()
+    associacoes_paginas_cache.invalidate()
+    producao_cache.invalidate()
+
+def _erro_integridade(e: IntegrityError, nome: Optional[str]) -> ValueError:
+    """Traduz a violação de índice único numa mensagem para o usuário"""
+    mensagem = str(e.orig)
+    if "ix_associacoes_nome" in mensagem:
+        return ValueError(f"Já existe uma associação com o nome '{nome}'")
+    if "ix_associacoes_cnpj" in mensagem:
+        return ValueError("CNPJ já cadastrado")
+    return ValueError(f"Erro ao salvar associação: {mensagem}")
+
 def create_associacao(db: Session, associacao: schemas.AssociacaoCreate) -> models.Associacao:
     """
-    Cria um Parceiro (tipo ASSOCIACAO) e seus detalhes de Associação.
+    Cria a associação com uma única instrução:
+    INSERT ... ON CONFLICT (nome_normalizado) DO NOTHING RETURNING.
+    O índice único resolve a verificação de nome e a corrida entre duas
+    requisições simultâneas; se o nome já existe, levanta ValueError.
     """
-    # 1. Garante que o tipo 'ASSOCIACAO' existe
-    tipo_assoc = db.query(models.TipoParceiro).filter(
-        models.TipoParceiro.nome == "ASSOCIACAO"
-    ).first()
-    if not tipo_assoc:
-        tipo_assoc = models.TipoParceiro(nome="ASSOCIACAO")
-        db.add(tipo_assoc)
-        db.flush()
-    
-    id_tipo = tipo_assoc.id
+    dados = associacao.model_dump()
 
-    # 2. Cria o registro PAI (Parceiro)
-    db_parceiro = models.Parceiro(
-        nome=associacao.nome,  # ✅ Usa o nome do schema
-        id_tipo_parceiro=id_tipo
+    stmt = (
+        insert(models.Associacao)
+        .values(**dados, nome_normalizado=normalizar_nome(dados["nome"]))
+        .on_conflict_do_nothing(index_elements=[models.Associacao.nome_normalizado])
+        .returning(models.Associacao)
     )
-    db.add(db_parceiro)
-    
     try:
-        db.flush() 
+        db_associacao = db.scalars(stmt).first()
     except IntegrityError as e:
         db.rollback()
-        if "unique constraint" in str(e).lower() and "parceiros_nome_key" in str(e).lower():
-            raise ValueError(f"Já existe um parceiro com o nome '{associacao.nome}'")
-        raise e
-
-    # 3. Cria o registro FILHO (Associacao)
-    db_associacao = models.Associacao(
-        parceiro_id=db_parceiro.id,
-        lider=associacao.lider,
-        telefone=associacao.telefone,
-        email=associacao.email,
-        cnpj=associacao.cnpj,
-        logradouro=associacao.logradouro,
-        numero=associacao.numero,
-        complemento=associacao.complemento,
-        bairro=associacao.bairro,
-        cidade=associacao.cidade,
-        uf=associacao.uf,
-        status=associacao.status,
-        ativo=associacao.ativo
-    )
-    db.add(db_associacao)
+        raise _erro_integridade(e, dados["nome"]) from e
 
-    try:
-        db.commit() 
-        db.refresh(db_associacao)
-        return db_associacao
-    except Exception as e:
+    if db_associacao is None:
         db.rollback()
-        raise ValueError(f"Erro ao salvar associação: {e}") from e
+        raise ValueError(f"Já existe uma associação com o nome '{dados['nome']}'")
+
+    db.commit()
+    _invalidar_caches()
+    return db_associacao
 
 def update_associacao(db: Session, associacao_id: int, associacao_update: schemas.AssociacaoUpdate) -> Optional[models.Associacao]:
-    """
-    Atualiza uma associação.
-    Pode precisar atualizar a tabela 'parceiros' (para o nome) e 'associacoes' (para os detalhes).
-    """
-    # 1. Busca a Associacao (detalhes) pelo seu ID
+    """Atualiza uma associação (o nome_normalizado acompanha o nome, ver models.Associacao)"""
     db_associacao = get_associacao(db, associacao_id=associacao_id)
     if not db_associacao:
         return None
 
-    # 2. Pega o objeto Parceiro pai (antigo Doador)
-    db_parceiro = db_associacao.parceiro_info
-
-    # 3. Converte o schema de update para um dicionário
     update_data = associacao_update.model_dump(exclude_unset=True)
 
-    # 4. Itera e atualiza os campos nas tabelas corretas
     for key, value in update_data.items():
-        if key == 'nome':
-            # 'nome' pertence ao Parceiro
-            setattr(db_parceiro, key, value)
-        elif hasattr(db_associacao, key):
-            # 'lider', 'cnpj', 'ativo', 'endereco', etc. pertencem à Associacao
-            setattr(db_associacao, key, value)
-    
+        setattr(db_associacao, key, value)
+
     try:
         db.commit()
     except IntegrityError as e:
         db.rollback()
-        if "unique constraint" in str(e).lower() and "parceiros_nome_key" in str(e).lower():
-            raise ValueError(f"Já existe um parceiro com o nome '{update_data.get('nome')}'")
-        else:
-            raise e
-    except Exception as e:
-        db.rollback()
-        raise ValueError(f"Erro inesperado ao atualizar associação: {e}") from e
+        raise _erro_integridade(e, update_data.get("nome")) from e
 
+    _invalidar_caches()
     db.refresh(db_associacao)
     return db_associacao
 
@@ -179,38 +119,83 @@ def delete_associacao(db: Session, associacao_id: int) -> Optional[models.Associ
     db_associacao.ativo = False
     
     db.commit()
+    _invalidar_caches()
     db.refresh(db_associacao)
     
     return db_associacao
 
 # =============== FUNÇÕES PARA PRODUÇÃO ===============
 
-def get_associacao_with_producao(db: Session, associacao_id: int, ano: int = None):
-    """Buscar associação com dados de produção"""
-    from sqlalchemy.orm import joinedload
-    
-    query = db.query(models.Associacao).options(
-        joinedload(models.Associacao.parceiro_info),
-        joinedload(models.Associacao.producoes)
-    ).filter(models.Associacao.id == associacao_id)
-    
+def get_associacao_with_producao(db: Session, associacao_id: int, ano: int = None) -> Optional[models.Associacao]:
+    """Buscar associação com as produções carregadas (só as do ano, se informado)"""
+    producoes = models.Associacao.producoes
     if ano:
-        # Filtra produções do ano específico
-        query = query.join(models.ProducaoMensal).filter(
-            models.ProducaoMensal.ano == ano
-        )
-    
-    return query.first()
+        producoes = producoes.and_(models.ProducaoImpacto.ano == ano)
+
+    return db.query(models.Associacao).options(
+        selectinload(producoes)
+    ).filter(models.Associacao.id == associacao_id).first()
 
 def get_total_producao_by_associacao(db: Session, associacao_id: int, ano: int) -> float:
-    """Somar produção total de uma associação no ano"""
-    from sqlalchemy import func
-    
-    result = db.query(func.sum(models.ProducaoMensal.kg)).filter(
+    """Somar produção total (kg) de uma associação no ano"""
+    result = db.query(func.sum(models.ProducaoImpacto.peso_kg)).filter(
         and_(
-            models.ProducaoMensal.associacao_id == associacao_id,
-            models.ProducaoMensal.ano == ano
+            models.ProducaoImpacto.associacao_id == associacao_id,
+            models.ProducaoImpacto.ano == ano
         )
     ).scalar()
-    
-    return float(result) if result else 0.0
\ No newline at end of file
+
+    return float(result) if result else 0.0
+
+def get_painel_associacao(db: Session, associacao_id: int) -> Optional[dict]:
+    """
+    Dados do painel de uma associação em 3 queries, independente do volume:
+    a associação, afiliados agrupados por função e produção somada por ano.
+    """
+    db_associacao = get_associacao(db, associacao_id=associacao_id)
+    if not db_associacao:
+        return None
+
+    afiliados = (
+        db.query(
+            models.Afiliado.funcao,
+            func.count().label("total"),
+            func.count().filter(models.Afiliado.ativo == True).label("ativos"),
+        )
+        .filter(models.Afiliado.associacao_id == associacao_id)
+        .group_by(models.Afiliado.funcao)
+        .order_by(models.Afiliado.funcao.asc().nulls_last())
+        .all()
+    )
+
+    producao = (
+        db.query(
+            models.ProducaoImpacto.ano,
+            func.coalesce(func.sum(models.ProducaoImpacto.peso_kg), 0).label("peso_kg"),
+            func.coalesce(func.sum(models.ProducaoImpacto.valor_gerado), 0).label("valor_gerado"),
+            func.count(models.ProducaoImpacto.mes.distinct()).label("meses_informados"),
+        )
+        .filter(models.ProducaoImpacto.associacao_id == associacao_id)
+        .group_by(models.ProducaoImpacto.ano)
+        .order_by(models.ProducaoImpacto.ano.desc())
+        .all()
+    )
+
+    return {
+        "associacao": db_associacao,
+        "afiliados_total": sum(row.total for row in afiliados),
+        "afiliados_ativos": sum(row.ativos for row in afiliados),
+        "afiliados_por_funcao": [
+            {"funcao": row.funcao, "total": row.total, "ativos": row.ativos}
+            for row in afiliados
+        ],
+        "producao_por_ano": [
+            {
+                "ano": row.ano,
+                "peso_kg": float(row.peso_kg),
+                "valor_gerado": float(row.valor_gerado),
+                "meses_informados": row.meses_informados,
+            }
+            for row in producao
+        ],
+    }
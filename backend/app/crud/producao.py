@@ -1,7 +1,18 @@
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from app.models import ProducaoImpacto
+from sqlalchemy import Numeric, String, func, literal_column
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.dialects.postgresql import insert
+from app.core.cache import producao_cache
+from app.models import Associacao, ProducaoImpacto
 from app.schemas.schema_producao import ProducaoImpactoCreate, ProducaoImpactoUpdate
-from typing import List, Optional
+from app.utils.planilhas import ErroLinha
+from typing import Iterable, List, Optional, Tuple, Union
+
+# Linhas por INSERT ... ON CONFLICT (fica bem abaixo do limite de parâmetros do Postgres)
+LOTE_TAMANHO = 1000
+# Quantos erros de importação são devolvidos em detalhe (o total é sempre contado)
+MAX_ERROS_RELATADOS = 1000
 
 def get_producoes(db: Session, skip: int = 0, limit: int = 100) -> List[ProducaoImpacto]:
     """Busca todas as produções (Ideal para o painel geral)"""
@@ -16,6 +27,7 @@ def create_producao(db: Session, producao: ProducaoImpactoCreate) -> ProducaoImp
     db_producao = ProducaoImpacto(**producao.model_dump())
     db.add(db_producao)
     db.commit()
+    producao_cache.invalidate()
     db.refresh(db_producao)
     return db_producao
 
@@ -31,6 +43,7 @@ def update_producao(db: Session, producao_id: int, producao_update: ProducaoImpa
         setattr(db_producao, key, value)
     
     db.commit()
+    producao_cache.invalidate()
     db.refresh(db_producao)
     return db_producao
 
@@ -42,4 +55,265 @@ def delete_producao(db: Session, producao_id: int) -> bool:
     
     db.delete(db_producao)
     db.commit()
-    return True
\ No newline at end of file
+    producao_cache.invalidate()
+    return True
+
+def _verificar_colunas(dados: dict) -> Optional[str]:
+    """
+    Confere os valores contra os limites das colunas de producao_impacto
+    (tamanho de String, precisão de Numeric), que o schema não cobre.
+    Retorna a descrição do problema ou None.
+    """
+    for coluna in ProducaoImpacto.__table__.columns:
+        valor = dados.get(coluna.name)
+        if valor is None:
+            continue
+        if isinstance(coluna.type, String) and coluna.type.length and len(valor) > coluna.type.length:
+            return f"{coluna.name}: máximo de {coluna.type.length} caracteres"
+        if isinstance(coluna.type, Numeric):
+            escala = coluna.type.scale or 0
+            limite = 10 ** (coluna.type.precision - escala)
+            if abs(round(valor, escala)) >= limite:
+                return f"{coluna.name}: deve ser menor que {limite}"
+    return None
+
+def upsert_producoes_lote(db: Session, producoes: List[ProducaoImpactoCreate], manter_existentes: bool = False) -> List[dict]:
+    """
+    Insere ou atualiza vários registros de uma vez, usando a trava_producao_unica
+    (associacao_id + mes + ano + categoria) como chave do ON CONFLICT.
+    Retorna um resultado por linha enviada: criado, atualizado, substituido
+    (mesma chave repetida mais adiante no lote, que prevalece) ou erro.
+    Uma linha recusada não derruba as outras.
+
+    Um registro que já existe é substituído por inteiro: valor_gerado ou
+    observado ausentes no lote gravam NULL. Com manter_existentes=True
+    (importação de planilha), valores ausentes mantêm o que já estava gravado.
+    """
+    resultados = [None] * len(producoes)
+
+    # 1. Valida as associações com uma única consulta
+    ids_associacoes = {p.associacao_id for p in producoes}
+    ids_existentes = {
+        row.id for row in db.query(Associacao.id).filter(Associacao.id.in_(ids_associacoes))
+    } if ids_associacoes else set()
+
+    # 2. Monta as linhas; a mesma chave repetida no lote vale pela última ocorrência
+    linhas = {}
+    for indice, producao in enumerate(producoes):
+        if producao.associacao_id not in ids_existentes:
+            resultados[indice] = {"indice": indice, "status": "erro", "detalhe": f"Associação {producao.associacao_id} não encontrada"}
+            continue
+        dados = producao.model_dump(mode="json")
+        problema = _verificar_colunas(dados)
+        if problema:
+            resultados[indice] = {"indice": indice, "status": "erro", "detalhe": problema}
+            continue
+        chave = (dados["associacao_id"], dados["mes"], dados["ano"], dados["categoria"])
+        if chave in linhas:
+            anterior = linhas[chave][0]
+            resultados[anterior] = {"indice": anterior, "status": "substituido", "detalhe": f"Mesmo registro da linha {indice} do lote, que foi gravada no lugar desta"}
+        linhas[chave] = (indice, dados)
+
+    # 3. INSERT ... ON CONFLICT DO UPDATE em blocos. O statement (Core, na tabela)
+    #    é compilado uma vez e o SQLAlchemy envia cada bloco como VALUES múltiplos
+    #    (insertmanyvalues). xmax = 0 indica linha recém-inserida.
+    tabela = ProducaoImpacto.__table__
+    stmt = insert(tabela)
+    set_ = {
+        "peso_kg": stmt.excluded.peso_kg,
+        "valor_gerado": stmt.excluded.valor_gerado,
+        "observado": stmt.excluded.observado,
+    }
+    if manter_existentes:
+        set_["valor_gerado"] = func.coalesce(stmt.excluded.valor_gerado, tabela.c.valor_gerado)
+        set_["observado"] = func.coalesce(stmt.excluded.observado, tabela.c.observado)
+    stmt = stmt.on_conflict_do_update(
+        constraint="trava_producao_unica",
+        set_=set_,
+    ).returning(
+        tabela.c.id,
+        tabela.c.associacao_id,
+        tabela.c.mes,
+        tabela.c.ano,
+        tabela.c.categoria,
+        literal_column("(xmax = 0)").label("inserido"),
+    )
+
+    # Cada bloco roda num SAVEPOINT: se o banco recusar alguma linha, só o bloco
+    # volta atrás e é refeito linha a linha para apontar a culpada.
+    pendentes = list(linhas.values())
+    for inicio in range(0, len(pendentes), LOTE_TAMANHO):
+        bloco = pendentes[inicio:inicio + LOTE_TAMANHO]
+        try:
+            with db.begin_nested():
+                rows = db.connection().execute(stmt, [dados for _, dados in bloco]).all()
+        except DBAPIError:
+            rows = []
+            for indice, dados in bloco:
+                try:
+                    with db.begin_nested():
+                        rows += db.connection().execute(stmt, [dados]).all()
+                except DBAPIError as e:
+                    resultados[indice] = {"indice": indice, "status": "erro", "detalhe": f"Recusado pelo banco: {e.orig}".strip()}
+
+        for row in rows:
+            indice = linhas[(row.associacao_id, row.mes, row.ano, row.categoria)][0]
+            resultados[indice] = {
+                "indice": indice,
+                "status": "criado" if row.inserido else "atualizado",
+                "id": row.id,
+            }
+
+    db.commit()
+    producao_cache.invalidate()
+    return resultados
+
+
+def importar_producoes(db: Session, linhas: Iterable[Tuple[int, Union[dict, ErroLinha]]]) -> dict:
+    """
+    Importa linhas de planilha (número da linha, dados): valida cada uma com
+    ProducaoImpactoCreate e grava em blocos de LOTE_TAMANHO com upsert_producoes_lote.
+    Linhas ilegíveis (ErroLinha), inválidas ou recusadas pelo banco viram erro
+    com o número da linha, sem interromper o resto. Só um bloco fica em memória.
+    Células vazias ou colunas fora da planilha não apagam valor_gerado/observado
+    de registros que já existem.
+    """
+    resumo = {"linhas": 0, "criados": 0, "atualizados": 0, "substituidos": 0, "erros": 0, "detalhes_erros": []}
+
+    def registrar_erro(numero: int, detalhe: str):
+        resumo["erros"] += 1
+        if len(resumo["detalhes_erros"]) < MAX_ERROS_RELATADOS:
+            resumo["detalhes_erros"].append({"linha": numero, "detalhe": detalhe})
+
+    def gravar(bloco: List[Tuple[int, ProducaoImpactoCreate]]):
+        try:
+            resultados = upsert_producoes_lote(db, [producao for _, producao in bloco], manter_existentes=True)
+        except DBAPIError as e:
+            # Falha do próprio banco (conexão, etc.); linhas recusadas já vêm como erro
+            db.rollback()
+            for numero, _ in bloco:
+                registrar_erro(numero, f"Falha do banco ao gravar o bloco: {e.orig}")
+            return
+        for (numero, _), resultado in zip(bloco, resultados):
+            if resultado["status"] == "erro":
+                registrar_erro(numero, resultado["detalhe"])
+            elif resultado["status"] == "criado":
+                resumo["criados"] += 1
+            elif resultado["status"] == "atualizado":
+                resumo["atualizados"] += 1
+            else:
+                resumo["substituidos"] += 1
+
+    bloco = []
+    for numero, dados in linhas:
+        resumo["linhas"] += 1
+        if isinstance(dados, ErroLinha):
+            registrar_erro(numero, dados.detalhe)
+            continue
+        try:
+            bloco.append((numero, ProducaoImpactoCreate(**dados)))
+        except ValidationError as e:
+            registrar_erro(numero, "; ".join(
+                f"{'.'.join(str(c) for c in erro['loc'])}: {erro['msg']}" for erro in e.errors()
+            ))
+        if len(bloco) >= LOTE_TAMANHO:
+            gravar(bloco)
+            bloco = []
+    if bloco:
+        gravar(bloco)
+
+    return resumo
+
+
+# Dimensões aceitas pelo pivot -> coluna correspondente
+DIMENSOES_PIVOT = {
+    "categoria": ProducaoImpacto.categoria,
+    "associacao": ProducaoImpacto.associacao_id,
+    "mes": ProducaoImpacto.mes,
+}
+
+def get_producao_pivot(db: Session, ano: int, dimensoes: List[str]) -> List[dict]:
+    """
+    Somas de peso_kg e valor_gerado do ano com todos os subtotais das dimensões
+    pedidas (GROUP BY CUBE), em uma única query. GROUPING() diz, para cada linha,
+    quais dimensões estão detalhadas e quais estão somadas.
+    """
+    colunas = [DIMENSOES_PIVOT[d] for d in dimensoes]
+    flags = [func.grouping(col).label(f"g_{d}") for d, col in zip(dimensoes, colunas)]
+
+    rows = (
+        db.query(
+            *colunas,
+            *flags,
+            func.coalesce(func.sum(ProducaoImpacto.peso_kg), 0).label("peso_kg"),
+            func.coalesce(func.sum(ProducaoImpacto.valor_gerado), 0).label("valor_gerado"),
+        )
+        .filter(ProducaoImpacto.ano == ano)
+        .group_by(func.cube(*colunas))
+        .order_by(*[col.asc().nulls_last() for col in colunas])
+        .all()
+    )
+
+    linhas = []
+    for row in rows:
+        linha = {
+            "agrupado_por": [d for d in dimensoes if getattr(row, f"g_{d}") == 0],
+            "peso_kg": float(row.peso_kg),
+            "valor_gerado": float(row.valor_gerado),
+        }
+        for d, col in zip(dimensoes, colunas):
+            linha[col.key] = getattr(row, col.key)
+        linhas.append(linha)
+    return linhas
+
+
+def get_producao_analise(db: Session, ano: int, associacao_id: Optional[int] = None) -> List[dict]:
+    """
+    Série mensal do ano com comparação ano a ano, somas móveis de 3 e 12 meses
+    e acumulado no ano, calculada com funções de janela em uma única query.
+    As janelas usam RANGE sobre o índice do mês (ano * 12 + mes), então meses
+    sem registro não deslocam as comparações.
+    """
+    indice_mes = ProducaoImpacto.ano * 12 + ProducaoImpacto.mes
+    peso = func.sum(ProducaoImpacto.peso_kg)
+    valor = func.coalesce(func.sum(ProducaoImpacto.valor_gerado), 0)
+
+    # Busca o ano anterior também, para alimentar as janelas de 12 meses
+    mensal = (
+        db.query(
+            ProducaoImpacto.ano,
+            ProducaoImpacto.mes,
+            peso.label("peso_kg"),
+            valor.label("valor_gerado"),
+            func.sum(peso).over(order_by=indice_mes, range_=(-12, -12)).label("peso_kg_ano_anterior"),
+            func.sum(peso).over(order_by=indice_mes, range_=(-2, 0)).label("soma_3_meses_kg"),
+            func.sum(peso).over(order_by=indice_mes, range_=(-11, 0)).label("soma_12_meses_kg"),
+            func.sum(peso).over(partition_by=ProducaoImpacto.ano, order_by=ProducaoImpacto.mes).label("acumulado_ano_kg"),
+            func.sum(valor).over(partition_by=ProducaoImpacto.ano, order_by=ProducaoImpacto.mes).label("acumulado_ano_valor"),
+        )
+        .filter(ProducaoImpacto.ano.between(ano - 1, ano))
+    )
+    if associacao_id:
+        mensal = mensal.filter(ProducaoImpacto.associacao_id == associacao_id)
+    mensal = mensal.group_by(ProducaoImpacto.ano, ProducaoImpacto.mes).subquery()
+
+    rows = db.query(mensal).filter(mensal.c.ano == ano).order_by(mensal.c.mes).all()
+
+    meses = []
+    for row in rows:
+        atual = float(row.peso_kg)
+        anterior = float(row.peso_kg_ano_anterior) if row.peso_kg_ano_anterior is not None else None
+        meses.append({
+            "ano": row.ano,
+            "mes": row.mes,
+            "peso_kg": atual,
+            "valor_gerado": float(row.valor_gerado),
+            "peso_kg_ano_anterior": anterior,
+            "variacao_anual_kg": atual - anterior if anterior is not None else None,
+            "variacao_anual_pct": (atual - anterior) / anterior * 100 if anterior else None,
+            "soma_3_meses_kg": float(row.soma_3_meses_kg),
+            "soma_12_meses_kg": float(row.soma_12_meses_kg),
+            "acumulado_ano_kg": float(row.acumulado_ano_kg),
+            "acumulado_ano_valor": float(row.acumulado_ano_valor),
+        })
+    return meses
@@ -2,11 +2,12 @@ import datetime
 from sqlalchemy import (
     Boolean, Column, ForeignKey, Integer, String, DateTime, Date,
     Float, UniqueConstraint, func, Enum, Numeric, Text, 
-    CheckConstraint
+    CheckConstraint, Index
 )
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from .database import Base 
+from .utils.texto import normalizar_nome
 import enum
 
 
@@ -99,6 +100,8 @@ class Associacao(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String(150), unique=True, index=True, nullable=False)
+    # ✅ nome sem acento/minúsculo/trim: busca e unicidade por índice (ver normalizar_nome)
+    nome_normalizado = Column(String(150), unique=True, index=True, nullable=False)
     cnpj = Column(String(20), unique=True, index=True, nullable=True)  # ✅ Nullable para casos sem CNPJ
     lider = Column(String(100), nullable=True)
     telefone = Column(String(20), nullable=True)
@@ -119,6 +122,11 @@ class Associacao(Base):
     afiliados = relationship("Afiliado", back_populates="associacao", cascade="all, delete-orphan")
     producoes = relationship("ProducaoImpacto", back_populates="associacao", cascade="all, delete-orphan")
 
+    @validates("nome")
+    def _sincronizar_nome_normalizado(self, key, nome):
+        self.nome_normalizado = normalizar_nome(nome)
+        return nome
+
 
 class Afiliado(Base):
     __tablename__ = "afiliados"
@@ -157,4 +165,10 @@ class ProducaoImpacto(Base):
         UniqueConstraint('associacao_id', 'mes', 'ano', 'categoria', name='trava_producao_unica'),
         CheckConstraint('mes >= 1 AND mes <= 12', name='chk_mes_valido'),
         CheckConstraint('peso_kg >= 0', name='chk_peso_positivo'),
+        # ✅ Consultas públicas filtram por ano (e às vezes associação) e ordenam por mês.
+        #    O INCLUDE cobre as somas (total, pivot, análise) com index-only scan.
+        Index(
+            'ix_producao_impacto_ano_associacao_mes', 'ano', 'associacao_id', 'mes',
+            postgresql_include=['categoria', 'peso_kg', 'valor_gerado'],
+        ),
     )
\ No newline at end of file
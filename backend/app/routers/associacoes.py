@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy.exc import IntegrityError
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Response
+from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app import models
 from .. import crud, schemas
+from app.core.cache import associacoes_cache, associacoes_paginas_cache, cached_json_response
 from app.database import get_db
 from ..dependencies import get_current_user
 
@@ -19,89 +19,50 @@ def create_associacao(
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_user)
 ):
-    """Criar nova associação - versão robusta"""
-    
-    # =============== PASSO 1: Garantir parceiro_id ===============
-    if associacao.nome and associacao.parceiro_id is None:
-        nome_limpo = associacao.nome.strip().lower()
-        
-        # 🔍 Busca EXATA (case-insensitive via Python, não SQL)
-        todos_parceiros = db.query(models.Parceiro).all()
-        parceiro = next(
-            (p for p in todos_parceiros if p.nome.strip().lower() == nome_limpo),
-            None
-        )
-        
-        if not parceiro:
-            # ➕ Cria novo parceiro
-            tipo_assoc = db.query(models.TipoParceiro).filter(
-                models.TipoParceiro.nome == "ASSOCIACAO"
-            ).first()
-            
-            if not tipo_assoc:
-                tipo_assoc = models.TipoParceiro(nome="ASSOCIACAO")
-                db.add(tipo_assoc)
-                db.flush()
-            
-            parceiro = models.Parceiro(
-                nome=associacao.nome.strip(),  # Mantém case original para exibição
-                id_tipo_parceiro=tipo_assoc.id
-            )
-            db.add(parceiro)
-            db.flush()
-        
-        associacao.parceiro_id = parceiro.id
-    
-    # =============== PASSO 2: Criar associação ===============
+    """
+    Criar nova associação (requer autenticação).
+    Nome repetido (ignorando acentos, caixa e espaços) ou CNPJ repetido → 400.
+    """
     try:
-        nova_associacao = crud.create_associacao(db=db, associacao=associacao)
-        db.refresh(nova_associacao)
-        return nova_associacao
-        
-    except IntegrityError as e:
-        db.rollback()
-        
-        # 🔄 Race condition: tenta re-fetch e retry uma vez
-        if "ix_parceiros_nome" in str(e) and associacao.nome:
-            nome_limpo = associacao.nome.strip().lower()
-            parceiro = next(
-                (p for p in db.query(models.Parceiro).all() 
-                 if p.nome.strip().lower() == nome_limpo),
-                None
-            )
-            if parceiro:
-                associacao.parceiro_id = parceiro.id
-                try:
-                    nova_associacao = crud.create_associacao(db=db, associacao=associacao)
-                    db.refresh(nova_associacao)
-                    return nova_associacao
-                except IntegrityError:
-                    pass  # Cai para o erro de CNPJ abaixo
-        
-        if "cnpj" in str(e).lower() or "ix_associacoes_cnpj" in str(e):
-            raise HTTPException(status_code=400, detail="CNPJ já cadastrado")
-        
-        raise HTTPException(status_code=400, detail=f"Erro: {str(e)}")
-        
-    except Exception as e:
-        db.rollback()
-        print(f"❌ ERRO: {type(e).__name__}: {e}")
-        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
+        return crud.create_associacao(db=db, associacao=associacao)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/", response_model=schemas.AssociacoesPaginadasResponse)
 def read_all_associacoes(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
     ativo: Optional[bool] = True,
     db: Session = Depends(get_db)
 ):
-    """Listar todas associações (público)"""
-    return crud.get_all_associacoes(db, skip=skip, limit=limit, ativo=ativo)
+    """
+    Listar todas associações (público, com cache e ETag).
+    As páginas ficam num cache próprio: combinações arbitrárias de skip/limit
+    não conseguem expulsar do cache a lista de /ativas.
+    """
+    chave = ("lista", skip, limit, ativo)
+    payload = associacoes_paginas_cache.get(chave)
+    if payload is None:
+        versao = associacoes_paginas_cache.versao
+        payload = associacoes_paginas_cache.set(chave, associacoes_paginas_cache.payload(
+            schemas.AssociacoesPaginadasResponse.model_validate(
+                crud.get_all_associacoes(db, skip=skip, limit=limit, ativo=ativo)
+            )
+        ), versao)
+    return cached_json_response(request, payload)
 
 @router.get("/ativas", response_model=List[schemas.AssociacaoResponse])
-def read_associacoes_ativas(db: Session = Depends(get_db)):
-    """Listar apenas associações ativas (para o frontend público)"""
-    return crud.get_associacoes_ativas(db)
+def read_associacoes_ativas(request: Request, db: Session = Depends(get_db)):
+    """Listar apenas associações ativas (para o frontend público, com cache e ETag)"""
+    chave = ("ativas",)
+    payload = associacoes_cache.get(chave)
+    if payload is None:
+        versao = associacoes_cache.versao
+        payload = associacoes_cache.set(chave, associacoes_cache.payload(
+            [schemas.AssociacaoResponse.model_validate(a) for a in crud.get_associacoes_ativas(db)]
+        ), versao)
+    return cached_json_response(request, payload)
 
 @router.get("/{associacao_id}", response_model=schemas.AssociacaoResponse)
 def read_associacao(
@@ -114,6 +75,18 @@ def read_associacao(
         raise HTTPException(status_code=404, detail="Associação não encontrada")
     return db_assoc
 
+@router.get("/{associacao_id}/painel", response_model=schemas.AssociacaoPainelResponse)
+def read_painel_associacao(
+    associacao_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(get_current_user)
+):
+    """Painel da associação: cadastro, afiliados por função e produção por ano (requer autenticação)"""
+    painel = crud.get_painel_associacao(db, associacao_id=associacao_id)
+    if not painel:
+        raise HTTPException(status_code=404, detail="Associação não encontrada")
+    return painel
+
 @router.put("/{associacao_id}", response_model=schemas.AssociacaoResponse)
 def update_associacao(
     associacao_id: int,
@@ -122,11 +95,14 @@ def update_associacao(
     current_user: models.Usuario = Depends(get_current_user)
 ):
     """Atualizar associação (requer autenticação)"""
-    db_assoc = crud.update_associacao(
-        db,
-        associacao_id=associacao_id,
-        associacao_update=associacao_update
-    )
+    try:
+        db_assoc = crud.update_associacao(
+            db,
+            associacao_id=associacao_id,
+            associacao_update=associacao_update
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not db_assoc:
         raise HTTPException(status_code=404, detail="Associação não encontrada")
     return db_assoc
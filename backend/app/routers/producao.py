@@ -1,57 +1,135 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 
 from app.database import get_db
 from app import models, schemas, crud
+from app.core.cache import producao_cache, cached_json_response
 from app.dependencies import get_current_user
+from app.utils.planilhas import ler_planilha_producao
+
+REDE_CNPJ = "09.000.185/0001-09"
 
 router = APIRouter(
     prefix="/api/producao",
     tags=["Produção"]
 )
 
+def _get_rede_id(db: Session) -> Optional[int]:
+    """ID da associação "Rede" (resolvido pelo CNPJ e guardado no cache)"""
+    rede_id = producao_cache.get(("rede_id",))
+    if rede_id is None:
+        versao = producao_cache.versao
+        rede = db.query(models.Associacao.id).filter(
+            models.Associacao.cnpj == REDE_CNPJ
+        ).first()
+        if rede:
+            rede_id = producao_cache.set(("rede_id",), rede.id, versao)
+    return rede_id
+
+
 @router.get("/", response_model=List[schemas.ProducaoImpactoResponse])
 def read_producao(
+    request: Request,
     ano: int = 2024,
     associacao_id: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    """Listar produção por ano (público)"""
+    """Listar produção por ano (público, com cache e ETag)"""
     
+    chave = ("producao", ano, associacao_id)
+    payload = producao_cache.get(chave)
+    if payload is None:
+        versao = producao_cache.versao
+        filtro_associacao = associacao_id or _get_rede_id(db)
 
-    if not associacao_id:
-        rede = db.query(models.Associacao).filter(
-            models.Associacao.cnpj == "09.000.185/0001-09"
-        ).first()
-        if rede:
-            associacao_id = rede.id
-    
+        query = db.query(models.ProducaoImpacto).filter(models.ProducaoImpacto.ano == ano)
+        if filtro_associacao:
+            query = query.filter(models.ProducaoImpacto.associacao_id == filtro_associacao)
 
-    query = db.query(models.ProducaoImpacto).filter(models.ProducaoImpacto.ano == ano)
-    if associacao_id:
-        query = query.filter(models.ProducaoImpacto.associacao_id == associacao_id)
-        
-    return query.order_by(models.ProducaoImpacto.mes.desc()).all()
+        producoes = query.order_by(models.ProducaoImpacto.mes.desc()).all()
+        payload = producao_cache.set(chave, producao_cache.payload(
+            [schemas.ProducaoImpactoResponse.model_validate(p) for p in producoes]
+        ), versao)
+
+    return cached_json_response(request, payload)
 
 
 @router.get("/total/{ano}", response_model=dict)
 def read_total_producao(
+    request: Request,
     ano: int,
     db: Session = Depends(get_db)
 ):
-    """Obter total de produção por ano (público)"""
+    """Obter total de produção por ano (público, com cache e ETag)"""
     from sqlalchemy import func
     
+    chave = ("total", ano)
+    payload = producao_cache.get(chave)
+    if payload is None:
+        versao = producao_cache.versao
+        total = db.query(
+            func.sum(models.ProducaoImpacto.peso_kg)
+        ).filter(
+            models.ProducaoImpacto.ano == ano
+        ).scalar()
+        payload = producao_cache.set(chave, producao_cache.payload(
+            {"ano": ano, "total_kg": float(total) if total else 0.0}
+        ), versao)
 
-    total = db.query(
-        func.sum(models.ProducaoImpacto.peso_kg)
-    ).filter(
-        models.ProducaoImpacto.ano == ano
-    ).scalar()
-    
-    return {"ano": ano, "total_kg": float(total) if total else 0.0}
+    return cached_json_response(request, payload)
+
+
+@router.get("/pivot", response_model=schemas.ProducaoPivotResponse)
+def read_producao_pivot(
+    request: Request,
+    ano: int = 2024,
+    dimensoes: str = "categoria,associacao,mes",
+    db: Session = Depends(get_db)
+):
+    """Produção do ano agrupada por categoria × associação × mês, com subtotais (público)"""
+    lista_dimensoes = [d.strip() for d in dimensoes.split(",") if d.strip()]
+    invalidas = [d for d in lista_dimensoes if d not in crud.DIMENSOES_PIVOT]
+    if not lista_dimensoes or invalidas or len(set(lista_dimensoes)) != len(lista_dimensoes):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Dimensões inválidas. Use uma ou mais de: {', '.join(crud.DIMENSOES_PIVOT)} (sem repetir)."
+        )
+
+    chave = ("pivot", ano, tuple(lista_dimensoes))
+    payload = producao_cache.get(chave)
+    if payload is None:
+        versao = producao_cache.versao
+        payload = producao_cache.set(chave, producao_cache.payload(schemas.ProducaoPivotResponse(
+            ano=ano,
+            dimensoes=lista_dimensoes,
+            linhas=crud.get_producao_pivot(db, ano=ano, dimensoes=lista_dimensoes)
+        )), versao)
+
+    return cached_json_response(request, payload)
+
+
+@router.get("/analise", response_model=schemas.ProducaoAnaliseResponse)
+def read_producao_analise(
+    request: Request,
+    ano: int = 2024,
+    associacao_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Comparação ano a ano, somas móveis e acumulado mensal (público, mesmos filtros da listagem)"""
+    chave = ("analise", ano, associacao_id)
+    payload = producao_cache.get(chave)
+    if payload is None:
+        versao = producao_cache.versao
+        filtro_associacao = associacao_id or _get_rede_id(db)
+        payload = producao_cache.set(chave, producao_cache.payload(schemas.ProducaoAnaliseResponse(
+            ano=ano,
+            associacao_id=filtro_associacao,
+            meses=crud.get_producao_analise(db, ano=ano, associacao_id=filtro_associacao)
+        )), versao)
+
+    return cached_json_response(request, payload)
 
 
 @router.post("/", response_model=schemas.ProducaoImpactoResponse, status_code=status.HTTP_201_CREATED)
@@ -78,4 +156,41 @@ def create_producao(
         raise HTTPException(
             status_code=400,
             detail="Erro de integridade ao registrar produção. Verifique os dados."
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/lote", response_model=schemas.ProducaoLoteResponse)
+def create_producao_lote(
+    producoes: List[schemas.ProducaoImpactoCreate],
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(get_current_user)
+):
+    """Criar ou atualizar vários registros de produção de uma vez (requer autenticação).
+    Registro existente é substituído por inteiro: campo omitido vira nulo."""
+    resultados = crud.upsert_producoes_lote(db, producoes=producoes)
+    contagem = {"criado": 0, "atualizado": 0, "substituido": 0, "erro": 0}
+    for resultado in resultados:
+        contagem[resultado["status"]] += 1
+
+    return {
+        "criados": contagem["criado"],
+        "atualizados": contagem["atualizado"],
+        "substituidos": contagem["substituido"],
+        "erros": contagem["erro"],
+        "resultados": resultados
+    }
+
+
+@router.post("/importar", response_model=schemas.ProducaoImportacaoResponse)
+def importar_producao(
+    arquivo: UploadFile = File(..., description="Planilha CSV ou XLSX com cabeçalho"),
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(get_current_user)
+):
+    """Importar planilha de produção mensal (requer autenticação)"""
+    # Formato, codificação e cabeçalho são checados antes de gravar qualquer linha
+    try:
+        linhas = ler_planilha_producao(arquivo.file, arquivo.filename or "")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return crud.importar_producoes(db, linhas)
\ No newline at end of file
@@ -2,7 +2,7 @@
 
 from .schema_usuario import UsuarioCreate, UsuarioResponse, UsuarioUpdate
 from .schema_token import Token, TokenData
-from .schema_associacao import AssociacaoCreate, AssociacaoResponse, AssociacaoUpdate, AssociacoesPaginadasResponse , AssociacoesListResponse
+from .schema_associacao import AssociacaoCreate, AssociacaoResponse, AssociacaoUpdate, AssociacoesPaginadasResponse , AssociacoesListResponse, AssociacaoPainelResponse
 from .schema_producao import *
 from .schema_grupo import GrupoCreate, GrupoResponse, GrupoUpdate
 from .schema_municipio import MunicipioCreate, MunicipioResponse , MunicipioUpdate , MunicipioBase
@@ -16,7 +16,7 @@ from .schema_categoria import CategoriaMaterial, CategoriaResponse
 
 __all__ = [
     "UsuarioCreate", "UsuarioResponse", "UsuarioUpdate", "Token", "TokenData",
-    "AssociacaoCreate", "AssociacaoResponse", "AssociacoesListResponse", "AssociacaoUpdate", "AssociacoesPaginadasResponse" , "AssociacoesListResponse"
+    "AssociacaoCreate", "AssociacaoResponse", "AssociacoesListResponse", "AssociacaoUpdate", "AssociacoesPaginadasResponse" , "AssociacoesListResponse", "AssociacaoPainelResponse",
     "ProducaoImpactoCreate", "ProducaoImpactoResponse",
     "GrupoCreate", "GrupoResponse", "GrupoUpdate",
     "MunicipioCreate", "MunicipioResponse", "MunicipioUpdate", "MunicipioUpdate" , "MunicipioBase"
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 from typing import Optional, List
 from datetime import datetime
 
@@ -15,6 +15,11 @@ class AssociacaoBase(BaseModel):
     municipio_id: Optional[int] = None
     grupo_id: Optional[int] = None
 
+    @field_validator('nome', mode='before')
+    def limpar_nome(cls, v):
+        # Antes do min_length: "  ab  " deve ser recusado, não gravado como "ab"
+        return v.strip() if isinstance(v, str) else v
+
 class AssociacaoCreate(AssociacaoBase):
     pass
 
@@ -32,6 +37,11 @@ class AssociacaoUpdate(BaseModel):
     grupo_id: Optional[int] = None
     ativo: Optional[bool] = None
 
+    @field_validator('nome', mode='before')
+    def limpar_nome(cls, v):
+        # Antes do min_length: "  ab  " deve ser recusado, não gravado como "ab"
+        return v.strip() if isinstance(v, str) else v
+
 class AssociacaoResponse(AssociacaoBase):
     id: int
     ativo: bool
@@ -52,6 +62,26 @@ class AssociacoesPaginadasResponse(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
 
+# =============== PAINEL DA ASSOCIAÇÃO ===============
+class AssociacaoAfiliadosFuncao(BaseModel):
+    funcao: Optional[str] = Field(None, description="None = afiliados sem função informada")
+    total: int
+    ativos: int
+
+class AssociacaoProducaoAno(BaseModel):
+    ano: int
+    peso_kg: float
+    valor_gerado: float
+    meses_informados: int = Field(..., description="Meses com algum registro de produção")
+
+class AssociacaoPainelResponse(BaseModel):
+    """Tudo que a tela de administração de uma associação precisa, em uma chamada"""
+    associacao: AssociacaoResponse
+    afiliados_total: int
+    afiliados_ativos: int
+    afiliados_por_funcao: List[AssociacaoAfiliadosFuncao]
+    producao_por_ano: List[AssociacaoProducaoAno]
+
 # =============== ALIAS PARA COMPATIBILIDADE ===============
 # Se quiser usar AssociacoesListResponse como alias:
 AssociacoesListResponse = AssociacoesPaginadasResponse
\ No newline at end of file
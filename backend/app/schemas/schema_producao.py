@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List, Literal
 from .schema_categoria import CategoriaMaterial 
 class ProducaoImpactoBase(BaseModel):
     mes: int = Field(..., ge=1, le=12, description="Mês (1-12)")
@@ -27,4 +27,71 @@ class ProducaoImpactoResponse(ProducaoImpactoBase):
 
 class ProducaoImpactoListResponse(BaseModel):
     items: list[ProducaoImpactoResponse]
-    total: int
\ No newline at end of file
+    total: int
+
+# =============== LOTE (UPSERT EM MASSA) ===============
+class ProducaoLoteResultado(BaseModel):
+    """Resultado de uma linha do lote, na mesma posição em que foi enviada"""
+    indice: int
+    status: Literal["criado", "atualizado", "substituido", "erro"] = Field(
+        ..., description="substituido = mesma chave repetida adiante no lote; a última ocorrência é a gravada"
+    )
+    id: Optional[int] = None
+    detalhe: Optional[str] = None
+
+class ProducaoLoteResponse(BaseModel):
+    criados: int
+    atualizados: int
+    substituidos: int
+    erros: int
+    resultados: List[ProducaoLoteResultado]
+
+
+# =============== PIVOT (SUBTOTAIS) ===============
+class ProducaoPivotLinha(BaseModel):
+    """Uma linha do pivot; dimensões fora de 'agrupado_por' estão somadas (subtotal)"""
+    categoria: Optional[str] = None
+    associacao_id: Optional[int] = None
+    mes: Optional[int] = None
+    agrupado_por: List[str]
+    peso_kg: float
+    valor_gerado: float
+
+class ProducaoPivotResponse(BaseModel):
+    ano: int
+    dimensoes: List[str]
+    linhas: List[ProducaoPivotLinha]
+
+
+# =============== ANÁLISE (ANO A ANO / JANELAS MÓVEIS) ===============
+class ProducaoAnaliseMes(BaseModel):
+    ano: int
+    mes: int
+    peso_kg: float
+    valor_gerado: float
+    peso_kg_ano_anterior: Optional[float] = Field(None, description="Mesmo mês do ano anterior")
+    variacao_anual_kg: Optional[float] = None
+    variacao_anual_pct: Optional[float] = None
+    soma_3_meses_kg: float = Field(..., description="Mês atual + 2 anteriores")
+    soma_12_meses_kg: float = Field(..., description="Mês atual + 11 anteriores")
+    acumulado_ano_kg: float
+    acumulado_ano_valor: float
+
+class ProducaoAnaliseResponse(BaseModel):
+    ano: int
+    associacao_id: Optional[int] = None
+    meses: List[ProducaoAnaliseMes]
+
+
+# =============== IMPORTAÇÃO DE PLANILHA ===============
+class ProducaoImportacaoErro(BaseModel):
+    linha: int = Field(..., description="Número da linha no arquivo (cabeçalho = 1)")
+    detalhe: str
+
+class ProducaoImportacaoResponse(BaseModel):
+    linhas: int
+    criados: int
+    atualizados: int
+    substituidos: int
+    erros: int
+    detalhes_erros: List[ProducaoImportacaoErro] = Field(..., description="Primeiros erros encontrados")
@@ -0,0 +1,154 @@
+import codecs
+import csv
+import io
+import zipfile
+from typing import BinaryIO, Iterator, NamedTuple, Tuple, Union
+
+# Colunas aceitas na planilha de produção (cabeçalho obrigatório na 1ª linha)
+COLUNAS_PRODUCAO = ("associacao_id", "mes", "ano", "categoria", "peso_kg", "valor_gerado", "observado")
+COLUNAS_OBRIGATORIAS = ("associacao_id", "mes", "ano", "categoria", "peso_kg")
+COLUNAS_DECIMAIS = ("peso_kg", "valor_gerado")
+
+FORMATOS_SUPORTADOS = ("csv", "xlsx")
+
+# UTF-8 primeiro; senão cp1252, que é como o Excel em pt-BR salva CSV
+CODIFICACOES_CSV = ("utf-8-sig", "cp1252")
+
+
+class ErroLinha(NamedTuple):
+    """Linha que não pôde ser lida; vira erro só dela na importação"""
+    detalhe: str
+
+
+def formato_planilha(nome_arquivo: str) -> str:
+    """Retorna 'csv' ou 'xlsx' a partir da extensão, ou levanta ValueError"""
+    formato = nome_arquivo.rsplit(".", 1)[-1].lower() if "." in nome_arquivo else ""
+    if formato not in FORMATOS_SUPORTADOS:
+        raise ValueError(f"Formato não suportado: use {' ou '.join(FORMATOS_SUPORTADOS)}.")
+    return formato
+
+
+def ler_planilha_producao(arquivo: BinaryIO, nome_arquivo: str) -> Iterator[Tuple[int, Union[dict, ErroLinha]]]:
+    """
+    Abre a planilha e devolve um iterador de (número da linha, dados da linha),
+    lido sob demanda (sem carregar o arquivo inteiro). Linhas vazias são puladas.
+
+    Formato, codificação, arquivo corrompido e cabeçalho são verificados aqui,
+    antes de qualquer linha ser devolvida, e levantam ValueError. Problemas
+    no meio do arquivo chegam como ErroLinha, sem interromper a leitura.
+    """
+    formato = formato_planilha(nome_arquivo)
+    linhas = _ler_csv(arquivo) if formato == "csv" else _ler_xlsx(arquivo)
+
+    primeira = next(linhas, None)
+    try:
+        if primeira is None or isinstance(primeira[1], ErroLinha):
+            raise ValueError("Planilha vazia ou sem cabeçalho legível.")
+
+        cabecalho = [str(v).strip().lower() if v is not None else "" for v in primeira[1]]
+        faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in cabecalho]
+        if faltando:
+            raise ValueError(f"Cabeçalho sem as colunas obrigatórias: {', '.join(faltando)}.")
+    except ValueError:
+        linhas.close()  # libera o arquivo agora, não quando o gerador for coletado
+        raise
+
+    return _linhas_producao(cabecalho, linhas)
+
+
+def _linhas_producao(cabecalho: list, linhas: Iterator[Tuple[int, object]]) -> Iterator[Tuple[int, Union[dict, ErroLinha]]]:
+    for numero, valores in linhas:
+        if isinstance(valores, ErroLinha):
+            yield numero, valores
+            continue
+        if all(_vazio(v) for v in valores):
+            continue
+        # zip() descartaria as sobras: "1,2,2024,PET,1,5" viraria peso_kg='1'
+        if not all(_vazio(v) for v in valores[len(cabecalho):]):
+            yield numero, ErroLinha("Linha com mais colunas que o cabeçalho.")
+            continue
+        dados = {}
+        for coluna, valor in zip(cabecalho, valores):
+            if coluna in COLUNAS_PRODUCAO:
+                dados[coluna] = _limpar(coluna, valor)
+        yield numero, dados
+
+
+def _vazio(valor) -> bool:
+    return valor is None or str(valor).strip() == ""
+
+
+def _limpar(coluna: str, valor):
+    if not isinstance(valor, str):
+        return valor
+    valor = valor.strip()
+    if valor == "":
+        return None
+    # Planilhas em pt-BR: "1.234,56" -> "1234.56"
+    if coluna in COLUNAS_DECIMAIS and "," in valor:
+        valor = valor.replace(".", "").replace(",", ".")
+    return valor
+
+
+def _detectar_codificacao(arquivo: BinaryIO) -> str:
+    """Primeira codificação de CODIFICACOES_CSV que decodifica o arquivo inteiro"""
+    for codificacao in CODIFICACOES_CSV:
+        arquivo.seek(0)
+        decodificador = codecs.getincrementaldecoder(codificacao)()
+        try:
+            for bloco in iter(lambda: arquivo.read(1 << 20), b""):
+                decodificador.decode(bloco)
+            decodificador.decode(b"", final=True)
+        except UnicodeDecodeError:
+            continue
+        arquivo.seek(0)
+        return codificacao
+    raise ValueError("Codificação do CSV não reconhecida: salve o arquivo como UTF-8.")
+
+
+def _ler_csv(arquivo: BinaryIO) -> Iterator[Tuple[int, Union[list, ErroLinha]]]:
+    # Decide a codificação antes de ler qualquer linha: um erro de decodificação
+    # no meio do arquivo chegaria depois de blocos já gravados.
+    codificacao = _detectar_codificacao(arquivo)
+    texto = io.TextIOWrapper(arquivo, encoding=codificacao, newline="")
+    try:
+        primeira = texto.readline()
+        # Excel em pt-BR exporta CSV com ';'
+        delimitador = ";" if primeira.count(";") > primeira.count(",") else ","
+        texto.seek(0)
+        leitor = csv.reader(texto, delimiter=delimitador)
+        while True:
+            try:
+                valores = next(leitor)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                # O leitor se recupera na linha seguinte
+                yield leitor.line_num, ErroLinha(f"Linha de CSV inválida: {e}")
+                continue
+            yield leitor.line_num, valores
+    finally:
+        texto.detach()
+
+
+def _ler_xlsx(arquivo: BinaryIO) -> Iterator[Tuple[int, Union[tuple, ErroLinha]]]:
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError as e:
+        raise ValueError("Importação de XLSX requer o pacote 'openpyxl'.") from e
+
+    # read_only percorre a planilha em streaming, sem montar a árvore inteira
+    try:
+        workbook = load_workbook(arquivo, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError) as e:
+        raise ValueError("Arquivo XLSX inválido ou corrompido.") from e
+    numero = 0
+    try:
+        for numero, valores in enumerate(workbook.active.iter_rows(values_only=True), start=1):
+            yield numero, valores
+    except Exception as e:
+        # XML corrompido no meio da planilha: o que já foi lido continua valendo
+        yield numero + 1, ErroLinha(f"Leitura da planilha interrompida: {e}")
+    finally:
+        workbook.close()
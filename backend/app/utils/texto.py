@@ -0,0 +1,16 @@
+import unicodedata
+from typing import Optional
+
+
+def normalizar_nome(nome: Optional[str]) -> Optional[str]:
+    """
+    Forma canônica de um nome para busca e unicidade:
+    sem acentos, minúsculo, sem espaços nas pontas nem repetidos.
+    Ex: '  Associação  JOSÉ de Alencar ' → 'associacao jose de alencar'
+    """
+    if nome is None:
+        return None
+    sem_acento = "".join(
+        c for c in unicodedata.normalize("NFKD", nome) if not unicodedata.combining(c)
+    )
+    return " ".join(sem_acento.lower().split())
@@ -0,0 +1,125 @@
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sqlalchemy import text
+from app.database import engine
+
+# Uso: python scripts/benchmark_producao.py [linhas]   (padrão: 10.000.000)
+# Cria uma cópia descartável de producao_impacto (producao_benchmark), enche com
+# dados sintéticos na ordem em que chegam de verdade (ano, mês) e compara as
+# consultas públicas por ano sem e com o índice da migration 7c1e5a9d2f40.
+# O "antes" tem os mesmos índices da tabela real antes da migration (PK,
+# trava_producao_unica, ix_producao_impacto_id). A tabela real não é tocada.
+
+TABELA = "producao_benchmark"
+CATEGORIAS = ["PET", "Papelão", "Vidro", "Plástico Duro", "Metal", "Misto"]
+ANOS = 50
+
+CONSULTAS = {
+    "listagem do ano": f"SELECT * FROM {TABELA} WHERE ano = :ano",
+    "listagem do ano (1 associação)": f"SELECT * FROM {TABELA} WHERE ano = :ano AND associacao_id = 7 ORDER BY mes",
+    "total do ano": f"SELECT sum(peso_kg) FROM {TABELA} WHERE ano = :ano",
+    "pivot categoria x mês": f"""
+        SELECT categoria, mes, sum(peso_kg), sum(valor_gerado)
+        FROM {TABELA} WHERE ano = :ano GROUP BY CUBE (categoria, mes)
+    """,
+}
+
+INDICES = [
+    f"""CREATE INDEX ix_{TABELA}_ano_associacao_mes ON {TABELA} (ano, associacao_id, mes)
+        INCLUDE (categoria, peso_kg, valor_gerado)""",
+]
+
+
+def medir(conn, ano: int, repeticoes: int = 5) -> dict:
+    """Melhor tempo (ms) de cada consulta, depois de uma execução para aquecer o cache"""
+    tempos = {}
+    for nome, sql in CONSULTAS.items():
+        conn.execute(text(sql), {"ano": ano}).fetchall()
+        melhor = None
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            conn.execute(text(sql), {"ano": ano}).fetchall()
+            decorrido = (time.perf_counter() - inicio) * 1000
+            melhor = decorrido if melhor is None else min(melhor, decorrido)
+        tempos[nome] = melhor
+    return tempos
+
+
+def benchmark(total_linhas: int):
+    # associação × mês × ano × categoria respeita a trava_producao_unica
+    associacoes = max(1, total_linhas // (12 * ANOS * len(CATEGORIAS)))
+    ano_inicial = 2025 - ANOS + 1
+    ano_medido = 2020
+
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.execute(text(f"DROP TABLE IF EXISTS {TABELA}"))
+        conn.execute(text(f"CREATE TABLE {TABELA} (LIKE producao_impacto INCLUDING ALL)"))
+        # Se o banco já passou pela migration, a cópia veio com o índice por ano:
+        # ele sai para que o "antes" seja a tabela como era
+        copiados = conn.execute(text("""
+            SELECT i.indexrelid::regclass::text
+            FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+            WHERE i.indrelid = CAST(:tabela AS regclass) AND NOT i.indisunique AND a.attname = 'ano'
+        """), {"tabela": TABELA}).scalars().all()
+        for indice in copiados:
+            conn.execute(text(f"DROP INDEX {indice}"))
+
+        print(f"🔄 Gerando {associacoes * 12 * ANOS * len(CATEGORIAS):,} linhas ({associacoes} associações, {ANOS} anos)...")
+        inicio = time.perf_counter()
+        conn.execute(text(f"""
+            INSERT INTO {TABELA} (id, mes, ano, categoria, peso_kg, valor_gerado, tipo_registro, associacao_id)
+            SELECT row_number() OVER (ORDER BY a, m, s), m, a, c, (random() * 500)::numeric(10, 2),
+                   (random() * 1000)::numeric(10, 2), 'PRODUCAO', s
+            FROM generate_series(:ano_inicial, :ano_final) a,
+                 generate_series(1, 12) m,
+                 generate_series(1, :associacoes) s,
+                 unnest(CAST(:categorias AS varchar[])) c
+            ORDER BY a, m, s
+        """), {
+            "ano_inicial": ano_inicial,
+            "ano_final": ano_inicial + ANOS - 1,
+            "associacoes": associacoes,
+            "categorias": CATEGORIAS,
+        })
+        conn.execute(text(f"VACUUM ANALYZE {TABELA}"))
+        print(f"   ⏱️  {time.perf_counter() - inicio:.1f}s")
+
+        print("📊 Sem índice por ano...")
+        antes = medir(conn, ano_medido)
+
+        print("🔧 Criando índice...")
+        inicio = time.perf_counter()
+        for sql in INDICES:
+            conn.execute(text(sql))
+        conn.execute(text(f"VACUUM ANALYZE {TABELA}"))
+        print(f"   ⏱️  {time.perf_counter() - inicio:.1f}s")
+
+        print("📊 Com índice por ano...")
+        depois = medir(conn, ano_medido)
+
+        tamanhos = conn.execute(text("""
+            SELECT c.relname, pg_size_pretty(pg_relation_size(c.oid))
+            FROM pg_class c
+            WHERE c.relname LIKE :prefixo
+            ORDER BY c.relname
+        """), {"prefixo": f"%{TABELA}%"}).all()
+
+        conn.execute(text(f"DROP TABLE {TABELA}"))
+
+    print("\n" + "="*60)
+    print(f"{'Consulta (ano ' + str(ano_medido) + ')':<34}{'antes':>10}{'depois':>10}")
+    for nome in CONSULTAS:
+        print(f"{nome:<34}{antes[nome]:>8.1f}ms{depois[nome]:>8.1f}ms")
+    print("-"*60)
+    for nome, tamanho in tamanhos:
+        print(f"   {nome}: {tamanho}")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
@@ -0,0 +1,47 @@
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.database import SessionLocal
+from app import crud
+from app.utils.planilhas import ler_planilha_producao
+
+# Uso: python scripts/importar_producao.py producao_2024.xlsx
+# Colunas: associacao_id, mes, ano, categoria, peso_kg, valor_gerado, observado
+
+def importar(caminho: str):
+    db = SessionLocal()
+    inicio = time.perf_counter()
+
+    with open(caminho, "rb") as arquivo:
+        try:
+            linhas = ler_planilha_producao(arquivo, caminho)
+        except ValueError as e:
+            print(f"❌ {e}")
+            db.close()
+            sys.exit(1)
+        resumo = crud.importar_producoes(db, linhas)
+
+    db.close()
+
+    print("\n" + "="*60)
+    print(f"📄 Arquivo: {caminho}")
+    print(f"   Linhas lidas: {resumo['linhas']}")
+    print(f"   ➕ Criados: {resumo['criados']}")
+    print(f"   🔄 Atualizados: {resumo['atualizados']}")
+    print(f"   🔁 Repetidas (substituídas por linha posterior): {resumo['substituidos']}")
+    print(f"   ❌ Erros: {resumo['erros']}")
+    print(f"   ⏱️  Tempo: {time.perf_counter() - inicio:.1f}s")
+    print("="*60)
+
+    for erro in resumo["detalhes_erros"]:
+        print(f"   Linha {erro['linha']}: {erro['detalhe']}")
+    if resumo["erros"] > len(resumo["detalhes_erros"]):
+        print(f"   ... e mais {resumo['erros'] - len(resumo['detalhes_erros'])} erros")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Uso: python scripts/importar_producao.py <arquivo.csv|arquivo.xlsx>")
+        sys.exit(1)
+    importar(sys.argv[1])
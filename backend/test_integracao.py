@@ -78,6 +78,147 @@ def run_integration_tests():
     else:
          print(f"{Colors.RED}❌ [VACINA] Comportamento inesperado. Status: {res2.status_code} - {res2.text}{Colors.RESET}")
 
+    def checar(ok, rotulo, detalhe=""):
+        if ok:
+            print(f"{Colors.GREEN}✅ {rotulo}{Colors.RESET}")
+        else:
+            print(f"{Colors.RED}❌ {rotulo} {detalhe}{Colors.RESET}")
+
+    # ==========================================================
+    # TESTE 4: LOTE (criado, atualizado, associação inexistente, repetido)
+    # ==========================================================
+    from app.models import ProducaoImpacto
+    db = SessionLocal()
+    db.query(ProducaoImpacto).filter(ProducaoImpacto.ano == 2098).delete()
+    db.commit()
+    db.close()
+
+    lote = [
+        {"mes": 1, "ano": 2098, "categoria": "PET", "peso_kg": 10, "associacao_id": 1},
+        {"mes": 1, "ano": 2098, "categoria": "PET", "peso_kg": 12, "associacao_id": 1},
+        {"mes": 2, "ano": 2098, "categoria": "Vidro", "peso_kg": 5, "associacao_id": 1},
+        {"mes": 2, "ano": 2098, "categoria": "Vidro", "peso_kg": 5, "associacao_id": 999999},
+    ]
+    res = client.post("/api/producao/lote", json=lote)
+    status_lote = [r["status"] for r in res.json().get("resultados", [])] if res.status_code == 200 else []
+    checar(status_lote == ["substituido", "criado", "criado", "erro"],
+           "[LOTE] Criados, repetido substituído e associação inexistente como erro.", f"{res.status_code} {status_lote}")
+
+    res = client.post("/api/producao/lote", json=[lote[2]])
+    checar(res.status_code == 200 and res.json()["resultados"][0]["status"] == "atualizado",
+           "[LOTE] Reenvio da mesma chave atualiza o registro.", res.text)
+
+    # ==========================================================
+    # TESTE 5: CACHE (304 com ETag, ETag novo depois de escrita)
+    # ==========================================================
+    res = client.get("/api/producao/total/2098")
+    etag = res.headers.get("etag")
+    res_304 = client.get("/api/producao/total/2098", headers={"If-None-Match": etag})
+    res_fraco = client.get("/api/producao/total/2098", headers={"If-None-Match": f"W/{etag}"})
+    checar(etag and res_304.status_code == 304 and res_fraco.status_code == 304,
+           "[CACHE] If-None-Match (forte e W/) responde 304.", f"{res_304.status_code} {res_fraco.status_code}")
+
+    client.post("/api/producao/lote", json=[{**lote[2], "peso_kg": 6}])
+    res = client.get("/api/producao/total/2098", headers={"If-None-Match": etag})
+    checar(res.status_code == 200 and res.headers.get("etag") != etag and res.json()["total_kg"] == 18.0,
+           "[CACHE] Escrita invalida o cache e gera ETag novo.", f"{res.status_code} {res.text}")
+
+    # ==========================================================
+    # TESTE 6: PIVOT (dimensão fora da lista)
+    # ==========================================================
+    res = client.get("/api/producao/pivot", params={"ano": 2098, "dimensoes": "categoria,cor"})
+    checar(res.status_code == 400, "[PIVOT] Dimensão inválida responde 400.", str(res.status_code))
+
+    # ==========================================================
+    # TESTE 7: ANÁLISE (ano anterior faltando, janelas cruzando janeiro)
+    # ==========================================================
+    db = SessionLocal()
+    db.query(ProducaoImpacto).filter(ProducaoImpacto.ano.in_([2096, 2097])).delete()
+    db.commit()
+    db.close()
+
+    pesos = {(2096, 11): 10, (2096, 12): 20, (2097, 1): 5, (2097, 2): 7, (2097, 12): 1}
+    client.post("/api/producao/lote", json=[
+        {"mes": mes, "ano": ano, "categoria": "PET", "peso_kg": peso, "associacao_id": 1}
+        for (ano, mes), peso in pesos.items()
+    ])
+    res = client.get("/api/producao/analise", params={"ano": 2097, "associacao_id": 1})
+    meses = {m["mes"]: m for m in res.json().get("meses", [])} if res.status_code == 200 else {}
+    checar(sorted(meses) == [1, 2, 12], "[ANÁLISE] Só os meses com registro aparecem.", f"{res.status_code} {sorted(meses)}")
+
+    if sorted(meses) == [1, 2, 12]:
+        jan, fev, dez = meses[1], meses[2], meses[12]
+        checar(jan["peso_kg_ano_anterior"] is None and jan["variacao_anual_pct"] is None
+               and dez["peso_kg_ano_anterior"] == 20.0 and dez["variacao_anual_kg"] == -19.0,
+               "[ANÁLISE] Comparação anual usa o mesmo mês do ano anterior (ou nenhum).", f"{jan} {dez}")
+        checar((jan["soma_3_meses_kg"], fev["soma_3_meses_kg"], dez["soma_3_meses_kg"]) == (35.0, 32.0, 1.0),
+               "[ANÁLISE] Soma de 3 meses atravessa janeiro sem contar meses vazios.",
+               f"{jan['soma_3_meses_kg']} {fev['soma_3_meses_kg']} {dez['soma_3_meses_kg']}")
+        checar((jan["soma_12_meses_kg"], fev["soma_12_meses_kg"], dez["soma_12_meses_kg"]) == (35.0, 42.0, 13.0),
+               "[ANÁLISE] Soma de 12 meses inclui o fim do ano anterior.",
+               f"{jan['soma_12_meses_kg']} {fev['soma_12_meses_kg']} {dez['soma_12_meses_kg']}")
+
+    # ==========================================================
+    # TESTE 8: IMPORTAÇÃO (planilha sem valor_gerado não apaga o gravado)
+    # ==========================================================
+    client.post("/api/producao/lote", json=[
+        {"mes": 3, "ano": 2098, "categoria": "PET", "peso_kg": 4, "valor_gerado": 50, "observado": "lote", "associacao_id": 1}
+    ])
+    planilha = "associacao_id;mes;ano;categoria;peso_kg\n1;3;2098;PET;9,5\n1;13;2098;PET;1\n"
+    res = client.post("/api/producao/importar", files={"arquivo": ("producao.csv", planilha.encode("cp1252"), "text/csv")})
+    resumo = res.json() if res.status_code == 200 else {}
+    checar(resumo.get("atualizados") == 1 and resumo.get("erros") == 1 and resumo["detalhes_erros"][0]["linha"] == 3,
+           "[IMPORTAÇÃO] Resumo com atualizado e erro apontando a linha.", f"{res.status_code} {res.text}")
+
+    db = SessionLocal()
+    registro = db.query(ProducaoImpacto).filter_by(associacao_id=1, mes=3, ano=2098, categoria="PET").first()
+    db.close()
+    checar(registro and registro.peso_kg == 9.5 and registro.valor_gerado == 50 and registro.observado == "lote",
+           "[IMPORTAÇÃO] Colunas fora da planilha mantêm o valor gravado.",
+           f"{registro and (registro.peso_kg, registro.valor_gerado, registro.observado)}")
+
+    # ==========================================================
+    # TESTE 9: ASSOCIAÇÃO (nome normalizado e espaços nas pontas)
+    # ==========================================================
+    client.post("/api/associacoes/", json={"nome": "Associação Acentuação Teste"})
+    res = client.post("/api/associacoes/", json={"nome": "  ASSOCIACAO acentuacao   teste "})
+    checar(res.status_code == 400 and "Já existe" in res.text,
+           "[ASSOCIAÇÃO] Nome que só muda acento/caixa/espaços é recusado.", f"{res.status_code} {res.text}")
+
+    res = client.post("/api/associacoes/", json={"nome": "  ab  "})
+    checar(res.status_code == 422, "[ASSOCIAÇÃO] Nome curto com espaços em volta é recusado.", f"{res.status_code} {res.text}")
+
+    # ==========================================================
+    # TESTE 10: ATIVAS (304 com ETag, cache limpo depois de PUT)
+    # ==========================================================
+    db = SessionLocal()
+    id_teste = db.query(Associacao.id).filter(Associacao.nome_normalizado == "associacao acentuacao teste").scalar()
+    db.close()
+
+    res = client.get("/api/associacoes/ativas")
+    etag = res.headers.get("etag")
+    res_304 = client.get("/api/associacoes/ativas", headers={"If-None-Match": etag})
+    checar(etag and res_304.status_code == 304, "[ATIVAS] If-None-Match responde 304.", str(res_304.status_code))
+
+    import time
+    lider = f"Líder {time.time_ns()}"
+    client.put(f"/api/associacoes/{id_teste}", json={"lider": lider})
+    res = client.get("/api/associacoes/ativas", headers={"If-None-Match": etag})
+    lideres = [a["lider"] for a in res.json()] if res.status_code == 200 else []
+    checar(res.status_code == 200 and res.headers.get("etag") != etag and lider in lideres,
+           "[ATIVAS] PUT invalida o cache e a lista já vem atualizada.", str(res.status_code))
+
+    # ==========================================================
+    # TESTE 11: PAINEL (totais por ano, associação inexistente)
+    # ==========================================================
+    res = client.get("/api/associacoes/1/painel")
+    anos = {a["ano"]: a for a in res.json().get("producao_por_ano", [])} if res.status_code == 200 else {}
+    checar(anos.get(2097, {}).get("peso_kg") == 13.0 and anos[2097]["meses_informados"] == 3,
+           "[PAINEL] Produção por ano soma o ano e conta os meses informados.", f"{res.status_code} {anos.get(2097)}")
+
+    res = client.get("/api/associacoes/999999999/painel")
+    checar(res.status_code == 404, "[PAINEL] Associação inexistente responde 404.", str(res.status_code))
+
     app.dependency_overrides.clear()
 
 if __name__ == "__main__":
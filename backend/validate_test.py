@@ -41,6 +41,7 @@ class BackendValidator:
         self.test_schemas_pydantic()
         self.test_jwt_auth()
         self.test_safe_crud()
+        self.test_planilhas()
         self.print_summary()
 
     def test_imports(self):
@@ -170,6 +171,48 @@ class BackendValidator:
         except Exception as e:
             self.assert_test("Setup do CRUD de teste", False, str(e))
 
+    def test_planilhas(self):
+        self.print_header("7. TESTANDO LEITURA DE PLANILHAS (sem banco)")
+        try:
+            import io
+            from app.utils.planilhas import ler_planilha_producao, ErroLinha
+
+            def ler(conteudo: bytes):
+                return list(ler_planilha_producao(io.BytesIO(conteudo), "producao.csv"))
+
+            # Excel pt-BR: ';', cp1252 e decimal com vírgula
+            linhas = ler("associacao_id;mes;ano;categoria;peso_kg\n1;2;2024;Papelão;1.234,56\n".encode("cp1252"))
+            self.assert_test(
+                "CSV com ';', cp1252 e '1.234,56'",
+                linhas == [(2, {"associacao_id": "1", "mes": "2", "ano": "2024", "categoria": "Papelão", "peso_kg": "1234.56"})],
+                str(linhas),
+            )
+
+            # UTF-8 com BOM, ',' e células vazias no fim da linha
+            linhas = ler("associacao_id,mes,ano,categoria,peso_kg,valor_gerado\n1,2,2024,PET,10.5,,,\n".encode("utf-8-sig"))
+            self.assert_test(
+                "CSV com ',', BOM e sobras vazias",
+                linhas == [(2, {"associacao_id": "1", "mes": "2", "ano": "2024", "categoria": "PET", "peso_kg": "10.5", "valor_gerado": None})],
+                str(linhas),
+            )
+
+            # Célula a mais com valor não pode deslocar nem sumir
+            linhas = ler(b"associacao_id,mes,ano,categoria,peso_kg\n1,2,2024,PET,1,5\n1,3,2024,PET,2\n")
+            self.assert_test(
+                "Linha com colunas a mais vira erro só dela",
+                len(linhas) == 2 and isinstance(linhas[0][1], ErroLinha) and linhas[1][1].get("peso_kg") == "2",
+                str(linhas),
+            )
+
+            try:
+                ler(b"associacao_id,mes,ano,categoria\n1,2,2024,PET\n")
+                self.assert_test("Cabeçalho sem peso_kg é recusado", False, "Não levantou ValueError")
+            except ValueError:
+                self.assert_test("Cabeçalho sem peso_kg é recusado", True)
+
+        except Exception as e:
+            self.assert_test("Leitura de planilhas", False, str(e))
+
     def print_summary(self):
         self.print_header("RESULTADO FINAL")
         print(f"Total de testes: {self.passed + self.failed}")